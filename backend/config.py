@@ -4,11 +4,12 @@ Contains all environment variables and system settings
 """
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from backend/.env (scripts/index_data.py loads the same file)
+load_dotenv(Path(__file__).resolve().parent / ".env")
 
 # ============================================
 # Directory Paths
@@ -17,24 +18,69 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 VECTOR_DB_DIR = BASE_DIR / "vector_db"
 PROMPTS_DIR = BASE_DIR / "backend" / "prompts"
+INDEX_MANIFEST_PATH = DATA_DIR / ".index_manifest.json"  # Files already indexed, for incremental runs
 
 # ============================================
 # Embedding Model Configuration
 # ============================================
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-EMBEDDING_DEVICE = "cpu"  # Change to "cuda" if GPU is available
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "auto")  # "auto" uses CUDA when available, else CPU
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "128"))  # Chunks per forward pass
+EMBED_FP16 = os.getenv("EMBED_FP16", "true").lower() == "true"  # Half precision (CUDA only)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface")  # "huggingface" or "onnx"
+ONNX_MODEL_DIR = BASE_DIR / "models" / "all-MiniLM-L6-v2-onnx"  # Created by scripts/export_embed_onnx.py
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "model.onnx")  # "model_int8.onnx" after scripts/export_embed_int8.py
+
+# Shared embedding server (backend/embed_server.py); empty = load the model in-process
+EMBED_SERVER_SOCKET = os.getenv("EMBED_SERVER_SOCKET", "")  # e.g. /tmp/klu_embed.sock
+EMBED_COALESCE_WINDOW_MS = float(os.getenv("EMBED_COALESCE_WINDOW_MS", "5"))  # Batch concurrent requests
 
 # ============================================
 # ChromaDB Configuration
 # ============================================
 CHROMA_COLLECTION_NAME = "college_documents"
-CHROMA_PERSIST_DIRECTORY = str(VECTOR_DB_DIR)
+CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIR", str(VECTOR_DB_DIR))
+# HNSW build/search trade-offs. Graph settings are fixed when the collection is
+# created, so changing the profile rebuilds the collection on the next index run
+ANN_PROFILES = {
+    "fast": {"hnsw:construction_ef": 64, "hnsw:M": 12, "hnsw:search_ef": 64},
+    "balanced": {"hnsw:construction_ef": 100, "hnsw:M": 16, "hnsw:search_ef": 128},
+    "recall": {"hnsw:construction_ef": 200, "hnsw:M": 32, "hnsw:search_ef": 256},
+}
+ANN_PROFILE = os.getenv("ANN_PROFILE", "balanced")  # "fast", "balanced" or "recall"
+if ANN_PROFILE not in ANN_PROFILES:
+    raise ValueError(f"Unknown ANN_PROFILE: {ANN_PROFILE} (expected one of {', '.join(ANN_PROFILES)})")
+# Embeddings are L2-normalized, so cosine distance gives 1 - similarity directly.
+# A high sync threshold flushes the HNSW index to disk rarely during bulk ingest
+# (every add is already durable in Chroma's SQLite log)
+CHROMA_COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:sync_threshold": 10000,
+    **ANN_PROFILES[ANN_PROFILE],
+}
+
+# Embedding cache (reused across re-indexing runs for unchanged chunks)
+EMBEDDING_CACHE_PATH = str(VECTOR_DB_DIR / "embedding_cache.sqlite3")
+EMBED_DTYPE = os.getenv("EMBED_DTYPE", "fp16")  # Cache storage precision: fp32, fp16 or int8
+VECTOR_BATCH_SIZE = int(os.getenv("VECTOR_BATCH_SIZE", "256"))  # Chunks embedded/inserted per batch
+PIPELINE_CONCURRENCY = int(os.getenv("PIPELINE_CONCURRENCY", "2"))  # Batches indexed concurrently by scripts/index_data.py
 
 # ============================================
 # Document Processing Configuration
 # ============================================
 CHUNK_SIZE = 1000  # Characters per chunk
 CHUNK_OVERLAP = 200  # Overlap between chunks for context continuity
+MIN_CHUNK_SIZE = 100  # Chunks shorter than this are merged into a neighbour
+MAX_MERGED_CHUNK_SIZE = int(CHUNK_SIZE * 1.15)  # Upper bound after merging
+# "chars" sizes chunks by characters; "tokens" uses the embedding model's Rust tokenizer
+CHUNK_SIZING = os.getenv("CHUNK_SIZING", "chars")
+CHUNK_TOKENS = 254  # Tokens per chunk in "tokens" mode (MiniLM's 256 limit minus [CLS] and [SEP])
+CHUNK_OVERLAP_TOKENS = 50  # Token overlap in "tokens" mode
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(min(32, (os.cpu_count() or 4) + 4))))  # Chunking threads
+INDEX_WORKERS = int(os.getenv("INDEX_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))  # Parallel file parsing processes
+# Batch small text file reads through io_uring (Linux only, needs liburing from requirements-optional.txt)
+USE_URING = sys.platform == "linux" and os.getenv("USE_URING", "false").lower() == "true"
+URING_QUEUE_DEPTH = int(os.getenv("URING_QUEUE_DEPTH", "64"))  # Reads submitted per io_uring batch
 
 # ============================================
 # Ollama/LLaMA Configuration
@@ -55,6 +101,9 @@ TOP_K_RESULTS = int(os.getenv("TOP_K_RESULTS", "3"))  # Reduced for smaller mode
 API_TITLE = "College RAG Chatbot API"
 API_VERSION = "1.0.0"
 API_DESCRIPTION = "Production-ready RAG chatbot for college-related queries using LLaMA 3"
+PROD = os.getenv("PROD", "false").lower() == "true"  # Multi-worker server without auto-reload
+# Each worker loads its own embedding model (~90MB) unless EMBED_SERVER_SOCKET is set
+API_WORKERS = int(os.getenv("API_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
 
 # ============================================
 # Supported File Extensions
@@ -4,46 +4,297 @@ Handles loading and chunking of documents from the data directory
 Supports text files, PDFs, and other document formats
 """
 
+import asyncio
+import mmap
 import os
+import queue
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import List, Dict
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 import logging
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import (
-    TextLoader,
-    PyPDFLoader,
-    DirectoryLoader,
-)
+import docx
+from semantic_text_splitter import TextSplitter
+from tokenizers import Tokenizer
 from langchain_core.documents import Document
 
 from backend.config import (
     DATA_DIR,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
+    MIN_CHUNK_SIZE,
+    MAX_MERGED_CHUNK_SIZE,
+    CHUNK_SIZING,
+    CHUNK_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+    EMBEDDING_MODEL_NAME,
     SUPPORTED_EXTENSIONS,
+    INDEX_WORKERS,
+    CHUNK_WORKERS,
+    USE_URING,
+    URING_QUEUE_DEPTH,
 )
 
+# PyMuPDF (C core) is preferred; pure-Python pypdf is the fallback
+try:
+    import fitz
+except ImportError:
+    fitz = None
+    from pypdf import PdfReader
+
+# io_uring batched reads are optional; buffered reads are used without liburing
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Text files above this size are read in windows instead of one large string
+LARGE_TEXT_FILE_BYTES = 64 * 1024 * 1024
+TEXT_WINDOW_BYTES = 4 * 1024 * 1024
+
+# Bytes that must appear at the start of a valid file of these types
+FILE_SIGNATURES = {".pdf": b"%PDF", ".docx": b"PK\x03\x04"}
+
+
+def _read_text_windows(file_path: Path) -> List[str]:
+    """
+    Read a UTF-8 text file through a read-only memory map
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        The whole text as one string, or newline-aligned ~4MB windows for large files
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [""]
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) <= LARGE_TEXT_FILE_BYTES:
+                return [mm[:].decode("utf-8", errors="ignore")]
+            
+            # End each window on a newline so no line or UTF-8 sequence is cut
+            windows = []
+            start = 0
+            while start < len(mm):
+                end = mm.find(b"\n", min(start + TEXT_WINDOW_BYTES, len(mm)))
+                end = len(mm) if end == -1 else end + 1
+                windows.append(mm[start:end].decode("utf-8", errors="ignore"))
+                start = end
+            return windows
+
+
+def _read_files_uring(paths: List[Path]) -> List[bytes]:
+    """
+    Read whole files with one io_uring submission
+    
+    Args:
+        paths: Files to read (at most the ring size)
+        
+    Returns:
+        File contents, in the same order as paths
+    """
+    ring = liburing.io_uring()
+    cqes = liburing.io_uring_cqe()
+    liburing.io_uring_queue_init(len(paths), ring, 0)
+    
+    fds = []
+    buffers = []
+    sizes = [0] * len(paths)
+    try:
+        # One read SQE per file; user data carries the index back on completion
+        for idx, path in enumerate(paths):
+            fd = os.open(path, os.O_RDONLY)
+            fds.append(fd)
+            buffer = bytearray(os.fstat(fd).st_size)
+            buffers.append(buffer)
+            
+            sqe = liburing.io_uring_get_sqe(ring)
+            liburing.io_uring_prep_read(sqe, fd, buffer, len(buffer), 0)
+            liburing.io_uring_sqe_set_data64(sqe, idx)
+        
+        liburing.io_uring_submit(ring)
+        
+        for _ in paths:
+            liburing.io_uring_wait_cqe(ring, cqes)
+            cqe = cqes[0]
+            sizes[cqe.user_data] = liburing.trap_error(cqe.res)
+            liburing.io_uring_cqe_seen(ring, cqe)
+    finally:
+        for fd in fds:
+            os.close(fd)
+        liburing.io_uring_queue_exit(ring)
+    
+    # A short read (file changed underneath us) falls back to a buffered read
+    return [
+        bytes(buffer) if size == len(buffer) else path.read_bytes()
+        for path, buffer, size in zip(paths, buffers, sizes)
+    ]
+
+
+def _text_documents(windows: List[str], source: str) -> List[Document]:
+    """Build Documents for a text file; multi-window files get a part index"""
+    if len(windows) == 1:
+        return [Document(page_content=windows[0], metadata={"source": source})]
+    return [
+        Document(page_content=text, metadata={"source": source, "part": i})
+        for i, text in enumerate(windows)
+    ]
+
+
+def _validate_file(file_path: Path) -> Optional[str]:
+    """
+    Cheaply check that a file can be indexed before parsing it
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Reason the file was rejected, or None if it looks valid
+    """
+    file_extension = file_path.suffix.lower()
+    if file_extension not in SUPPORTED_EXTENSIONS:
+        return f"unsupported file type {file_extension}"
+    if file_path.stat().st_size == 0:
+        return "empty file"
+    
+    signature = FILE_SIGNATURES.get(file_extension)
+    if signature is not None:
+        # PDF readers tolerate a few junk bytes before the header
+        with open(file_path, "rb") as f:
+            if signature not in f.read(1024):
+                return f"not a valid {file_extension} file"
+    return None
+
+
+def _load_single_document(file_path: Path) -> List[Document]:
+    """
+    Load a single file and return documents
+    Module-level so it can be pickled into worker processes
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        List of Document objects
+        
+    Raises:
+        Exception: Any parser error, so callers can record the failed file
+    """
+    file_extension = file_path.suffix.lower()
+    source = str(file_path.relative_to(DATA_DIR.parent))
+    
+    if file_extension == ".pdf":
+        # Source metadata is set as each page Document is created
+        if fitz is not None:
+            with fitz.open(str(file_path)) as pdf:
+                page_texts = [page.get_text("text") for page in pdf]
+        else:
+            page_texts = [page.extract_text() or "" for page in PdfReader(str(file_path)).pages]
+        
+        documents = [
+            Document(page_content=text, metadata={"source": source, "page": i})
+            for i, text in enumerate(page_texts)
+        ]
+    elif file_extension in [".txt", ".md"]:
+        documents = _text_documents(_read_text_windows(file_path), source)
+    elif file_extension == ".docx":
+        word_doc = docx.Document(str(file_path))
+        text = "\n".join(paragraph.text for paragraph in word_doc.paragraphs)
+        documents = [Document(page_content=text, metadata={"source": source})]
+    else:
+        logger.warning(f"Unsupported file type: {file_path}")
+        return []
+    
+    logger.info(f"Loaded {len(documents)} document(s) from {file_path.name}")
+    return documents
+
+
+def _load_document_isolated(file_path: Path) -> Tuple[Path, List[Document], Optional[str]]:
+    """
+    Load a file in a worker without letting its errors escape
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        Tuple of (path, documents, error message or None)
+    """
+    try:
+        return file_path, _load_single_document(file_path), None
+    except Exception as e:
+        return file_path, [], str(e)
+
+
+@dataclass
+class LoadStats:
+    """Counts accumulated while documents stream through loading and chunking"""
+    
+    files_loaded: int = 0
+    documents_loaded: int = 0
+    chunks_per_source: Counter = field(default_factory=Counter)
+    
+    @property
+    def total_chunks(self) -> int:
+        """Number of chunks produced"""
+        return sum(self.chunks_per_source.values())
+    
+    @property
+    def sources(self) -> List[str]:
+        """Sorted source files that produced at least one chunk"""
+        return sorted(self.chunks_per_source)
+    
+    def record(self, documents: List[Document], chunks: List[Document]) -> None:
+        """Account for one loaded file and the chunks made from it"""
+        self.files_loaded += 1
+        self.documents_loaded += len(documents)
+        self.chunks_per_source.update(chunk.metadata.get("source", "unknown") for chunk in chunks)
+
 
 class DocumentLoader:
     """
     Loads and processes documents from the data directory
-    Chunks documents using RecursiveCharacterTextSplitter
+    Chunks documents using the Rust-backed semantic-text-splitter
     """
     
     def __init__(self):
         """Initialize the document loader with text splitter"""
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=CHUNK_SIZE,
-            chunk_overlap=CHUNK_OVERLAP,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
-        )
+        if CHUNK_SIZING == "tokens":
+            # Token counting runs in the Rust tokenizers library, in batches
+            self.tokenizer = Tokenizer.from_pretrained(EMBEDDING_MODEL_NAME)
+            self.text_splitter = TextSplitter.from_huggingface_tokenizer(
+                self.tokenizer,
+                capacity=CHUNK_TOKENS,
+                overlap=CHUNK_OVERLAP_TOKENS,
+            )
+            self.chunk_capacity = CHUNK_TOKENS
+            self.min_chunk_size = max(1, MIN_CHUNK_SIZE * CHUNK_TOKENS // CHUNK_SIZE)
+            # Merged chunks must still fit the model, so no headroom above capacity
+            self.max_merged_size = CHUNK_TOKENS
+        else:
+            self.tokenizer = None
+            self.text_splitter = TextSplitter(
+                capacity=CHUNK_SIZE,
+                overlap=CHUNK_OVERLAP,
+            )
+            self.chunk_capacity = CHUNK_SIZE
+            self.min_chunk_size = MIN_CHUNK_SIZE
+            self.max_merged_size = MAX_MERGED_CHUNK_SIZE
         self.data_dir = DATA_DIR
+        self.failed = []  # (path, reason) for files skipped during the last load
+        self.stats = LoadStats()  # Filled in by aiter_load_and_chunk
+        
+        if USE_URING and liburing is None:
+            logger.warning("USE_URING is set but liburing is not installed; using buffered reads")
         
     def load_single_file(self, file_path: Path) -> List[Document]:
         """
@@ -55,55 +306,240 @@ class DocumentLoader:
         Returns:
             List of Document objects
         """
-        try:
-            file_extension = file_path.suffix.lower()
+        _, documents, error = _load_document_isolated(file_path)
+        if error:
+            logger.error(f"Error loading file {file_path}: {error}")
+        return documents
+    
+    def scan_files(self, paths: Optional[List[Path]] = None) -> List[Path]:
+        """
+        Collect supported files from the data directory and drop invalid ones
+        Rejected files are recorded in self.failed
+        
+        Args:
+            paths: Files to consider instead of the whole data directory
             
-            if file_extension == ".pdf":
-                loader = PyPDFLoader(str(file_path))
-            elif file_extension in [".txt", ".md"]:
-                loader = TextLoader(str(file_path), encoding='utf-8')
+        Returns:
+            Sorted list of files that passed validation
+        """
+        if paths is None:
+            paths = (path for path in self.data_dir.rglob("*") if path.is_file())
+        file_paths = sorted(path for path in paths if path.suffix.lower() in SUPPORTED_EXTENSIONS)
+        
+        valid_paths = []
+        for path in file_paths:
+            reason = _validate_file(path)
+            if reason:
+                logger.warning(f"Skipping {path}: {reason}")
+                self.failed.append((path, reason))
             else:
-                logger.warning(f"Unsupported file type: {file_path}")
-                return []
-            
-            documents = loader.load()
+                valid_paths.append(path)
+        
+        logger.info(f"Validated {len(file_paths)} files ({len(file_paths) - len(valid_paths)} rejected)")
+        return valid_paths
+    
+    def _collect_result(
+        self,
+        file_path: Path,
+        documents: List[Document],
+        error: Optional[str],
+    ) -> List[Document]:
+        """Record a failed file and pass through the documents of a loaded one"""
+        if error:
+            logger.error(f"Error loading file {file_path}: {error}")
+            self.failed.append((file_path, error))
+        return documents
+    
+    def _iter_loaded_files(self, paths: Optional[List[Path]] = None) -> Iterator[List[Document]]:
+        """
+        Load supported files from the data directory, one file at a time
+        A file that fails to parse is recorded in self.failed and skipped
+        
+        Args:
+            paths: Files to load instead of the whole data directory
             
-            # Add source metadata
-            for doc in documents:
-                doc.metadata["source"] = str(file_path.relative_to(self.data_dir.parent))
+        Yields:
+            List of Document objects for each file, in completion order
+        """
+        self.failed = []
+        
+        if not self.data_dir.exists():
+            logger.error(f"Data directory not found: {self.data_dir}")
+            return
+        
+        file_paths = self.scan_files(paths)
+        
+        text_paths = []
+        if USE_URING and liburing is not None:
+            is_candidate = {path: self._is_uring_candidate(path) for path in file_paths}
+            text_paths = [path for path in file_paths if is_candidate[path]]
+            file_paths = [path for path in file_paths if not is_candidate[path]]
+        
+        # Parse files in parallel; a pool is not worth spawning for one file
+        workers = min(INDEX_WORKERS, len(file_paths))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Submit before the io_uring reads so the pool parses meanwhile
+                finished = queue.Queue()
+                for path in file_paths:
+                    executor.submit(_load_document_isolated, path).add_done_callback(finished.put)
+                
+                collected = 0
+                for documents in self._iter_uring_text_files(text_paths):
+                    yield documents
+                    while not finished.empty():
+                        yield self._collect_result(*finished.get().result())
+                        collected += 1
+                
+                for _ in range(len(file_paths) - collected):
+                    yield self._collect_result(*finished.get().result())
+        else:
+            yield from self._iter_uring_text_files(text_paths)
+            for file_path in file_paths:
+                yield self._collect_result(*_load_document_isolated(file_path))
+    
+    @staticmethod
+    def _is_uring_candidate(path: Path) -> bool:
+        """Small text files are read via io_uring; large ones keep the mmap path"""
+        return (
+            path.suffix.lower() in (".txt", ".md")
+            and 0 < path.stat().st_size <= LARGE_TEXT_FILE_BYTES
+        )
+    
+    def _read_bytes_isolated(self, file_path: Path) -> Optional[bytes]:
+        """Read a file, recording it in self.failed instead of raising"""
+        try:
+            return file_path.read_bytes()
+        except Exception as e:
+            self._collect_result(file_path, [], str(e))
+            return None
+    
+    def _iter_uring_text_files(self, text_paths: List[Path]) -> Iterator[List[Document]]:
+        """
+        Read small text files in batched io_uring submissions
+        
+        Args:
+            text_paths: Small text files (see _is_uring_candidate)
             
-            logger.info(f"Loaded {len(documents)} document(s) from {file_path.name}")
-            return documents
+        Yields:
+            List of Document objects for each text file
+        """
+        for start in range(0, len(text_paths), URING_QUEUE_DEPTH):
+            batch = text_paths[start:start + URING_QUEUE_DEPTH]
+            try:
+                contents = _read_files_uring(batch)
+            except Exception as e:
+                logger.warning(f"io_uring read failed, using buffered reads: {str(e)}")
+                contents = [self._read_bytes_isolated(path) for path in batch]
             
-        except Exception as e:
-            logger.error(f"Error loading file {file_path}: {str(e)}")
-            return []
+            for path, data in zip(batch, contents):
+                if data is None:
+                    continue
+                source = str(path.relative_to(DATA_DIR.parent))
+                text = data.decode("utf-8", errors="ignore")
+                yield _text_documents([text], source)
     
-    def load_all_documents(self) -> List[Document]:
+    def load_all_documents(self, paths: Optional[List[Path]] = None) -> List[Document]:
         """
         Load all documents from the data directory and subdirectories
         
+        Args:
+            paths: Files to load instead of the whole data directory
+            
         Returns:
             List of all Document objects
         """
         all_documents = []
+        for documents in self._iter_loaded_files(paths):
+            all_documents.extend(documents)
         
-        if not self.data_dir.exists():
-            logger.error(f"Data directory not found: {self.data_dir}")
-            return all_documents
+        logger.info(f"Total documents loaded: {len(all_documents)}")
+        return all_documents
+    
+    def _measure(self, texts: List[str]) -> List[int]:
+        """
+        Measure chunk lengths in the configured sizing unit
+        
+        Args:
+            texts: Texts to measure
+            
+        Returns:
+            Length of each text in characters or tokens
+        """
+        if self.tokenizer is None:
+            return [len(text) for text in texts]
+        
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        return [len(encoding.ids) for encoding in encodings]
+    
+    def _merge_small_chunks(self, chunks: List[Document]) -> List[Document]:
+        """
+        Merge tiny chunks into adjacent chunks from the same source
+        and re-split anything that ends up oversized
         
-        # Walk through all subdirectories
-        for root, dirs, files in os.walk(self.data_dir):
-            for file in files:
-                file_path = Path(root) / file
+        Args:
+            chunks: List of chunked Document objects, in source order
+            
+        Returns:
+            Compacted list of Document objects
+        """
+        merged = []
+        merged_lengths = []
+        
+        for chunk, length in zip(chunks, self._measure([c.page_content for c in chunks])):
+            if merged:
+                previous = merged[-1]
+                same_source = previous.metadata.get("source") == chunk.metadata.get("source")
+                is_small = length < self.min_chunk_size or merged_lengths[-1] < self.min_chunk_size
+                combined_length = merged_lengths[-1] + 1 + length
                 
-                # Check if file extension is supported
-                if file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
-                    documents = self.load_single_file(file_path)
-                    all_documents.extend(documents)
+                if same_source and is_small and combined_length <= self.max_merged_size:
+                    previous.page_content = f"{previous.page_content}\n{chunk.page_content}"
+                    merged_lengths[-1] = combined_length
+                    continue
+            
+            merged.append(chunk)
+            merged_lengths.append(length)
         
-        logger.info(f"Total documents loaded: {len(all_documents)}")
-        return all_documents
+        # Re-split any chunk that is still over the merged size limit
+        result = []
+        for chunk, length in zip(merged, merged_lengths):
+            if length > self.max_merged_size:
+                for piece in self.text_splitter.chunks(chunk.page_content):
+                    result.append(Document(page_content=piece, metadata=dict(chunk.metadata)))
+            else:
+                result.append(chunk)
+        
+        if chunks:
+            logger.info(
+                f"Chunk compaction: {len(chunks)} -> {len(result)} "
+                f"({len(result) / len(chunks):.0%} of original)"
+            )
+        
+        return result
+    
+    def _split_document(self, doc: Document) -> List[Document]:
+        """
+        Split a single document into chunks that keep its metadata
+        
+        Args:
+            doc: Document to split
+            
+        Returns:
+            List of chunked Document objects
+        """
+        # Documents that already fit in one chunk skip the splitter
+        # (a text never has more tokens than characters, so this is safe in both modes)
+        if len(doc.page_content) <= self.chunk_capacity:
+            content = doc.page_content.strip()
+            if not content:
+                return []
+            return [Document(page_content=content, metadata=dict(doc.metadata))]
+        
+        return [
+            Document(page_content=chunk, metadata=dict(doc.metadata))
+            for chunk in self.text_splitter.chunks(doc.page_content)
+        ]
     
     def chunk_documents(self, documents: List[Document]) -> List[Document]:
         """
@@ -120,24 +556,36 @@ class DocumentLoader:
             return []
         
         try:
-            chunked_docs = self.text_splitter.split_documents(documents)
+            # Split documents concurrently; map() keeps results in input order
+            workers = min(CHUNK_WORKERS, len(documents))
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(self._split_document, documents))
+            else:
+                results = [self._split_document(doc) for doc in documents]
+            
+            chunked_docs = list(chain.from_iterable(results))
+            chunked_docs = self._merge_small_chunks(chunked_docs)
             logger.info(f"Created {len(chunked_docs)} chunks from {len(documents)} documents")
             return chunked_docs
         except Exception as e:
             logger.error(f"Error chunking documents: {str(e)}")
             return []
     
-    def load_and_chunk(self) -> List[Document]:
+    def load_and_chunk(self, paths: Optional[List[Path]] = None) -> List[Document]:
         """
         Load all documents and chunk them in one operation
         
+        Args:
+            paths: Files to load instead of the whole data directory
+            
         Returns:
             List of chunked Document objects ready for embedding
         """
         logger.info("Starting document loading and chunking process...")
         
         # Load all documents
-        documents = self.load_all_documents()
+        documents = self.load_all_documents(paths)
         
         if not documents:
             logger.warning("No documents found to process")
@@ -149,6 +597,31 @@ class DocumentLoader:
         logger.info("Document loading and chunking completed successfully")
         return chunked_documents
     
+    async def aiter_load_and_chunk(self, paths: Optional[List[Path]] = None) -> AsyncIterator[Document]:
+        """
+        Stream chunks as each file is loaded, without materializing the corpus
+        Loading and chunking run in worker threads so the event loop stays free
+        for the consumer; counts are accumulated in self.stats
+        
+        Args:
+            paths: Files to load instead of the whole data directory
+            
+        Yields:
+            Chunked Document objects ready for embedding
+        """
+        logger.info("Starting async document loading and chunking...")
+        
+        self.stats = LoadStats()
+        loaded_files = self._iter_loaded_files(paths)
+        while (documents := await asyncio.to_thread(next, loaded_files, None)) is not None:
+            if documents:
+                chunks = await asyncio.to_thread(self.chunk_documents, documents)
+                self.stats.record(documents, chunks)
+                for chunk in chunks:
+                    yield chunk
+        
+        logger.info("Document loading and chunking completed successfully")
+    
     def get_document_stats(self, documents: List[Document]) -> Dict:
         """
         Get statistics about loaded documents
@@ -167,5 +640,11 @@ class DocumentLoader:
         return stats
 
 
+@lru_cache(maxsize=None)
+def get_loader() -> DocumentLoader:
+    """Return the process-wide loader, building its splitter and tokenizer once"""
+    return DocumentLoader()
+
+
 # Singleton instance
-document_loader = DocumentLoader()
+document_loader = get_loader()
@@ -0,0 +1,121 @@
+"""
+Embedding Server
+Loads the embedding model once and serves it to all API workers
+over a UNIX domain socket. Run with: python -m backend.embed_server
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI
+from pydantic import BaseModel, Field
+
+from backend.config import EMBED_SERVER_SOCKET, EMBED_COALESCE_WINDOW_MS
+from backend.embedding_client import EmbeddingClient, create_local_embeddings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class EmbedRequest(BaseModel):
+    """Texts to embed"""
+    texts: List[str] = Field(..., description="Texts to embed")
+
+
+class EmbedResponse(BaseModel):
+    """Embedding vectors aligned with the request texts"""
+    embeddings: List[List[float]] = Field(..., description="One vector per input text")
+
+
+class RequestCoalescer:
+    """
+    Collects requests arriving within a short window and embeds them
+    in a single batched forward pass
+    """
+    
+    def __init__(self, embeddings: EmbeddingClient, window_seconds: float):
+        """
+        Args:
+            embeddings: Loaded embedding model
+            window_seconds: How long to wait for more requests before embedding
+        """
+        self.embeddings = embeddings
+        self.window_seconds = window_seconds
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Queue texts for the next batch and wait for their vectors"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((texts, future))
+        
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+        
+        return await future
+    
+    async def _flush_after_window(self):
+        """Embed everything queued during the window in one call"""
+        await asyncio.sleep(self.window_seconds)
+        pending, self._pending, self._flush_task = self._pending, [], None
+        
+        all_texts = [text for texts, _ in pending for text in texts]
+        try:
+            vectors = await asyncio.to_thread(self.embeddings.embed_documents, all_texts)
+        except Exception as e:
+            logger.error(f"Error embedding batch: {str(e)}")
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        # Hand each caller back its own slice of the batch; callers that were
+        # cancelled meanwhile (e.g. client disconnected) are skipped
+        offset = 0
+        for texts, future in pending:
+            if not future.done():
+                future.set_result(vectors[offset:offset + len(texts)])
+            offset += len(texts)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the model once at startup"""
+    embeddings, model_key = create_local_embeddings()
+    app.state.model_key = model_key
+    app.state.coalescer = RequestCoalescer(embeddings, EMBED_COALESCE_WINDOW_MS / 1000)
+    logger.info(f"Embedding server ready ({model_key})")
+    
+    yield
+
+
+app = FastAPI(title="Embedding Server", lifespan=lifespan)
+
+
+@app.get("/info")
+async def info():
+    """Identify the model behind this server (used as the embedding cache key)"""
+    return {"model_key": app.state.model_key}
+
+
+@app.post("/embed", response_model=EmbedResponse)
+async def embed(request: EmbedRequest):
+    """Embed a batch of texts"""
+    vectors = await app.state.coalescer.embed(request.texts)
+    return EmbedResponse(embeddings=vectors)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    if not EMBED_SERVER_SOCKET:
+        raise SystemExit("Set EMBED_SERVER_SOCKET to the UNIX socket path to serve on")
+    
+    logger.info(f"Starting embedding server on {EMBED_SERVER_SOCKET}...")
+    uvicorn.run(app, uds=EMBED_SERVER_SOCKET, log_level="info")
@@ -0,0 +1,77 @@
+"""
+Embedder Module
+Batched sentence-transformers encoder used for indexing and queries
+Picks CUDA automatically when available and returns NumPy arrays
+"""
+
+import logging
+from typing import List
+
+import numpy as np
+import torch
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def resolve_device(device: str) -> str:
+    """Map "auto" to "cuda" when a GPU is available, else "cpu" """
+    if device == "auto":
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    return device
+
+
+class SentenceTransformerEmbedder(Embeddings):
+    """
+    Thin wrapper around SentenceTransformer.encode
+    Encodes whole lists in large normalized batches in a single call
+    """
+    
+    def __init__(self, model_name: str, device: str = "auto", batch_size: int = 128, fp16: bool = False):
+        """
+        Load the model
+        
+        Args:
+            model_name: sentence-transformers model name or path
+            device: "cpu", "cuda" or "auto"
+            batch_size: Number of texts per forward pass
+            fp16: Run in half precision (only applied on CUDA)
+        """
+        self.device = resolve_device(device)
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device=self.device)
+        
+        self.fp16 = fp16 and self.device == "cuda"
+        if self.fp16:
+            self.model = self.model.half()
+            logger.info("Embedding model converted to fp16")
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into an (N, D) float32 matrix of unit vectors
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            NumPy array of embeddings
+        """
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vectors.astype(np.float32, copy=False)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of document chunks"""
+        return self.encode(texts).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string"""
+        return self.encode([text])[0].tolist()
@@ -0,0 +1,139 @@
+"""
+Embedding Cache Module
+Persists document embeddings in SQLite keyed by content hash
+Lets re-indexing skip the embedding model for unchanged chunks
+"""
+
+import hashlib
+import logging
+import sqlite3
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# SQLite caps the number of bound parameters per statement
+_SQLITE_IN_CHUNK = 500
+
+SUPPORTED_DTYPES = ("fp32", "fp16", "int8")
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of a chunk's text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _encode_vector(vector: List[float], dtype: str) -> bytes:
+    """Serialize a vector; int8 blobs are prefixed with a float32 scale"""
+    values = np.asarray(vector, dtype=np.float32)
+    
+    if dtype == "fp16":
+        return values.astype(np.float16).tobytes()
+    if dtype == "int8":
+        scale = np.float32(max(float(np.abs(values).max()), 1e-12) / 127)
+        quantized = np.clip(np.round(values / scale), -127, 127).astype(np.int8)
+        return scale.tobytes() + quantized.tobytes()
+    return values.tobytes()
+
+
+def _decode_vector(blob: bytes, dtype: str) -> List[float]:
+    """Deserialize a vector back to float32 values"""
+    if dtype == "fp16":
+        return np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+    if dtype == "int8":
+        scale = np.frombuffer(blob[:4], dtype=np.float32)[0]
+        return (np.frombuffer(blob[4:], dtype=np.int8).astype(np.float32) * scale).tolist()
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of embedding vectors
+    Entries are keyed by (content hash, model key) so switching models never
+    returns stale vectors. Vectors can be stored as fp32, fp16 or int8
+    """
+    
+    def __init__(self, db_path: str, model_key: str, dtype: str = "fp32"):
+        """
+        Open (or create) the cache database
+        
+        Args:
+            db_path: Path to the SQLite file
+            model_key: Identifier of the model/device that produced the vectors
+            dtype: Storage precision, one of "fp32", "fp16", "int8"
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        
+        self.db_path = db_path
+        self.dtype = dtype
+        # Blobs of different precisions are not interchangeable
+        self.model_key = f"{model_key}|{dtype}"
+        
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embed_cache ("
+                "hash TEXT NOT NULL, "
+                "model TEXT NOT NULL, "
+                "vec BLOB NOT NULL, "
+                "PRIMARY KEY (hash, model))"
+            )
+    
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Look up cached vectors for the given hashes
+        
+        Args:
+            hashes: Content hashes to look up
+            
+        Returns:
+            Dictionary mapping hash to embedding vector for every cache hit
+        """
+        unique_hashes = list(dict.fromkeys(hashes))
+        found = {}
+        
+        with sqlite3.connect(self.db_path) as conn:
+            for start in range(0, len(unique_hashes), _SQLITE_IN_CHUNK):
+                chunk = unique_hashes[start:start + _SQLITE_IN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT hash, vec FROM embed_cache "
+                    f"WHERE model = ? AND hash IN ({placeholders})",
+                    [self.model_key, *chunk],
+                )
+                for row_hash, blob in rows:
+                    found[row_hash] = _decode_vector(blob, self.dtype)
+        
+        return found
+    
+    def put_many(self, hashes: List[str], vectors: List[List[float]]) -> int:
+        """
+        Store freshly computed vectors in the cache
+        
+        Args:
+            hashes: Content hashes, aligned with vectors
+            vectors: Embedding vectors to store
+            
+        Returns:
+            Bytes saved compared to storing the vectors as fp32
+        """
+        if not hashes:
+            return 0
+        
+        rows = []
+        bytes_saved = 0
+        for h, v in zip(hashes, vectors):
+            blob = _encode_vector(v, self.dtype)
+            bytes_saved += len(v) * 4 - len(blob)
+            rows.append((h, self.model_key, blob))
+        
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO embed_cache (hash, model, vec) VALUES (?, ?, ?)",
+                rows,
+            )
+        
+        return bytes_saved
@@ -0,0 +1,120 @@
+"""
+Embedding Client Module
+Builds the embedding model used by the vector store
+Either loads a model in-process or talks to the shared embedding server
+"""
+
+import logging
+from typing import List, Protocol, Tuple
+
+import httpx
+from langchain_core.embeddings import Embeddings
+
+from backend.config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_DEVICE,
+    EMBED_BATCH_SIZE,
+    EMBED_FP16,
+    EMBEDDING_BACKEND,
+    ONNX_MODEL_DIR,
+    ONNX_MODEL_FILE,
+    EMBED_SERVER_SOCKET,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingClient(Protocol):
+    """Interface shared by local models and the remote embedding server"""
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        ...
+    
+    def embed_query(self, text: str) -> List[float]:
+        ...
+
+
+class RemoteEmbeddings(Embeddings):
+    """
+    Embeddings served by backend/embed_server.py over a UNIX socket
+    Lets several API workers share one loaded model
+    """
+    
+    def __init__(self, socket_path: str):
+        """
+        Connect to the embedding server
+        
+        Args:
+            socket_path: Path of the server's UNIX domain socket
+        """
+        self.client = httpx.Client(
+            transport=httpx.HTTPTransport(uds=socket_path),
+            base_url="http://embed-server",
+            timeout=120,
+        )
+        
+        # The server reports which model produced its vectors
+        response = self.client.get("/info")
+        response.raise_for_status()
+        self.model_key = response.json()["model_key"]
+        logger.info(f"Connected to embedding server at {socket_path} ({self.model_key})")
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of document chunks on the server"""
+        response = self.client.post("/embed", json={"texts": list(texts)})
+        response.raise_for_status()
+        return response.json()["embeddings"]
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string on the server"""
+        return self.embed_documents([text])[0]
+
+
+def create_local_embeddings() -> Tuple[EmbeddingClient, str]:
+    """
+    Load the configured embedding model in this process
+    
+    Returns:
+        Tuple of (embeddings, model_key identifying the model/device/precision)
+    """
+    logger.info(f"Initializing {EMBEDDING_BACKEND} embeddings with model: {EMBEDDING_MODEL_NAME}")
+    
+    if EMBEDDING_BACKEND == "onnx":
+        # Imported lazily so onnxruntime is only required when selected
+        from backend.onnx_embeddings import OnnxEmbeddings
+        
+        embeddings = OnnxEmbeddings(
+            model_dir=str(ONNX_MODEL_DIR),
+            model_file=ONNX_MODEL_FILE,
+            batch_size=EMBED_BATCH_SIZE,
+        )
+        return embeddings, f"{EMBEDDING_MODEL_NAME}@onnx:{ONNX_MODEL_FILE}"
+    
+    # Imported lazily so the server-backed client does not need torch
+    from backend.embedder import SentenceTransformerEmbedder
+    
+    embeddings = SentenceTransformerEmbedder(
+        model_name=EMBEDDING_MODEL_NAME,
+        device=EMBEDDING_DEVICE,
+        batch_size=EMBED_BATCH_SIZE,
+        fp16=EMBED_FP16,
+    )
+    logger.info(f"Embedding model running on {embeddings.device}")
+    
+    return embeddings, f"{EMBEDDING_MODEL_NAME}@{embeddings.device}{':fp16' if embeddings.fp16 else ''}"
+
+
+def create_embeddings() -> Tuple[EmbeddingClient, str]:
+    """
+    Use the shared embedding server when configured, else a local model
+    
+    Returns:
+        Tuple of (embeddings, model_key)
+    """
+    if EMBED_SERVER_SOCKET:
+        remote = RemoteEmbeddings(EMBED_SERVER_SOCKET)
+        return remote, remote.model_key
+    
+    return create_local_embeddings()
@@ -0,0 +1,132 @@
+"""
+Incremental Indexing Module
+Tracks which files in data/ are already indexed and which chunks went stale
+Lets re-indexing touch only new, modified and removed files
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.config import DATA_DIR, INDEX_MANIFEST_PATH, SUPPORTED_EXTENSIONS
+
+
+def chunk_id(source: str, text: str) -> str:
+    """
+    Deterministic Chroma id for a chunk, derived from its source and content
+    Identical text in two files gets two ids, so pruning one file never
+    removes a chunk the other still contains
+    """
+    return hashlib.blake2b(f"{source}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def source_key(path: Path, data_dir: Path = DATA_DIR) -> str:
+    """Manifest key for a file; matches the "source" metadata of its chunks"""
+    return str(path.relative_to(data_dir.parent))
+
+
+def file_sha256(path: Path) -> str:
+    """Hash a file's contents without reading it into memory at once"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def snapshot_data_dir(data_dir: Path = DATA_DIR) -> Dict[Path, int]:
+    """Map every supported file in the data directory to its modification time"""
+    return {
+        path: path.stat().st_mtime_ns
+        for path in data_dir.rglob("*")
+        if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS
+    }
+
+
+def load_manifest(manifest_path: Path = INDEX_MANIFEST_PATH) -> Dict:
+    """Read the indexed-files manifest, or return an empty one"""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_manifest(manifest: Dict, manifest_path: Path = INDEX_MANIFEST_PATH) -> None:
+    """Write the manifest atomically so an interrupted run never leaves it truncated"""
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def plan_run(
+    previous: Dict[str, list],
+    data_dir: Path = DATA_DIR,
+) -> Tuple[List[Path], List[str], Dict[str, list]]:
+    """
+    Compare the data directory against the manifest
+    
+    Args:
+        previous: Manifest entries (source -> [mtime_ns, size, sha256]) of the last run
+        data_dir: Directory holding the documents
+    
+    Returns:
+        Tuple of (new or modified files, sources whose chunks must be removed,
+        entries for every current file)
+    """
+    delta = []
+    purged = []
+    entries = {}
+    
+    for path in sorted(snapshot_data_dir(data_dir)):
+        stat = path.stat()
+        key = source_key(path, data_dir)
+        old = previous.get(key)
+        
+        # Unchanged mtime and size: trust the entry without reading the file
+        if old and old[0] == stat.st_mtime_ns and old[1] == stat.st_size:
+            entries[key] = old
+            continue
+        
+        digest = file_sha256(path)
+        entries[key] = [stat.st_mtime_ns, stat.st_size, digest]
+        
+        # Touched but identical content needs no re-indexing
+        if old and old[2] == digest:
+            continue
+        
+        # An emptied file is rejected by the loader, so drop its chunks here
+        if stat.st_size == 0:
+            purged.append(key)
+        else:
+            delta.append(path)
+    
+    purged.extend(previous.keys() - entries.keys())
+    return delta, sorted(purged), entries
+
+
+def find_stale_ids(collection, seen_ids: Set[str], sources: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Find indexed chunks that the current run did not produce
+    
+    Args:
+        collection: Chroma collection
+        seen_ids: Chunk ids produced by the current run
+        sources: Sources re-indexed by an incremental run; None for a full run,
+            where every chunk in the collection is checked
+    
+    Returns:
+        Ids of chunks to delete
+    """
+    if sources is None:
+        indexed_ids = collection.get(include=[])["ids"]
+    else:
+        indexed_ids = [
+            doc_id
+            for source in sources
+            for doc_id in collection.get(where={"source": source}, include=[])["ids"]
+        ]
+    return [doc_id for doc_id in indexed_ids if doc_id not in seen_ids]
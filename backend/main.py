@@ -5,11 +5,13 @@ Provides endpoints for chat, health checks, and document indexing
 """
 
 import logging
+import httpx
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
 
-from backend.config import API_TITLE, API_VERSION, API_DESCRIPTION
+from backend.config import API_TITLE, API_VERSION, API_DESCRIPTION, PROD, API_WORKERS
 from backend.schemas import (
     ChatRequest,
     ChatResponse,
@@ -34,10 +36,17 @@ async def lifespan(app: FastAPI):
     logger.info(f"Vector store initialized: {vector_store.is_initialized()}")
     logger.info(f"Documents in collection: {vector_store.get_collection_count()}")
     
+    # Shared async client so generation never blocks the event loop
+    rag_pipeline.async_client = httpx.AsyncClient(timeout=120)
+    
+    # Load the LLM into Ollama's memory before the first request arrives
+    await rag_pipeline.warmup()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down RAG College Chatbot API...")
+    await rag_pipeline.async_client.aclose()
 
 
 # Initialize FastAPI app
@@ -67,6 +76,7 @@ async def root():
         "status": "running",
         "endpoints": {
             "chat": "/chat",
+            "chat_stream": "/chat/stream",
             "health": "/health",
             "docs": "/docs",
         }
@@ -80,7 +90,7 @@ async def health_check():
     Verifies that vector DB and Ollama are operational
     """
     vector_db_initialized = vector_store.is_initialized()
-    ollama_available = rag_pipeline.check_ollama_health()
+    ollama_available = await rag_pipeline.acheck_ollama_health()
     
     status = "healthy" if (vector_db_initialized and ollama_available) else "degraded"
     
@@ -91,6 +101,23 @@ async def health_check():
     )
 
 
+async def _ensure_ready():
+    """Raise 503 if the vector store or Ollama is not ready to serve chat"""
+    # Validate that vector store is initialized
+    if not vector_store.is_initialized():
+        raise HTTPException(
+            status_code=503,
+            detail="Vector database not initialized. Please run the indexing script first: python scripts/index_data.py"
+        )
+    
+    # Validate that Ollama is available
+    if not await rag_pipeline.acheck_ollama_health():
+        raise HTTPException(
+            status_code=503,
+            detail="Ollama service is not available. Please ensure Ollama is running with 'ollama serve' and the model is pulled with 'ollama pull llama3'"
+        )
+
+
 @app.post("/chat", response_model=ChatResponse, tags=["Chat"])
 async def chat(request: ChatRequest):
     """
@@ -104,23 +131,11 @@ async def chat(request: ChatRequest):
     5. Returns answer with source citations
     """
     try:
-        # Validate that vector store is initialized
-        if not vector_store.is_initialized():
-            raise HTTPException(
-                status_code=503,
-                detail="Vector database not initialized. Please run the indexing script first: python scripts/index_data.py"
-            )
-        
-        # Validate that Ollama is available
-        if not rag_pipeline.check_ollama_health():
-            raise HTTPException(
-                status_code=503,
-                detail="Ollama service is not available. Please ensure Ollama is running with 'ollama serve' and the model is pulled with 'ollama pull llama3'"
-            )
+        await _ensure_ready()
         
         # Generate response using RAG pipeline
         logger.info(f"Processing chat request: {request.question[:50]}...")
-        response = rag_pipeline.generate_response(request.question)
+        response = await rag_pipeline.agenerate_response(request.question)
         
         # Add conversation_id if provided
         if request.conversation_id:
@@ -138,6 +153,23 @@ async def chat(request: ChatRequest):
         )
 
 
+@app.post("/chat/stream", tags=["Chat"])
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint
+    
+    Returns server-sent events: a "sources" event with the citations as soon
+    as retrieval finishes, one "token" event per generated fragment, then "done"
+    """
+    await _ensure_ready()
+    
+    logger.info(f"Processing streaming chat request: {request.question[:50]}...")
+    return StreamingResponse(
+        rag_pipeline.stream_response(request.question),
+        media_type="text/event-stream",
+    )
+
+
 @app.get("/stats", tags=["Information"])
 async def get_stats():
     """
@@ -161,13 +193,28 @@ async def get_stats():
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
     
-    logger.info("Starting FastAPI server...")
-    uvicorn.run(
-        "backend.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    if PROD:
+        # uvloop is not available on Windows; fall back to the default loop there
+        logger.info(f"Starting FastAPI server in production mode with {API_WORKERS} workers...")
+        uvicorn.run(
+            "backend.main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=API_WORKERS,
+            loop="asyncio" if sys.platform == "win32" else "uvloop",
+            http="httptools",
+            reload=False,
+            log_level="info"
+        )
+    else:
+        logger.info("Starting FastAPI server...")
+        uvicorn.run(
+            "backend.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
@@ -0,0 +1,28 @@
+"""
+Math Utilities Module
+Vectorized helpers for embedding matrices
+"""
+
+import numpy as np
+
+# Guards against division by zero for all-zero vectors
+_EPSILON = 1e-12
+
+
+def normalize_2d(emb: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row of an (N, D) embedding matrix with one fused NumPy pass
+    
+    Args:
+        emb: Embedding matrix; float32 C-contiguous input is normalized in place
+    
+    Returns:
+        The normalized float32 matrix
+    """
+    emb = np.ascontiguousarray(emb, dtype=np.float32)
+    if emb.size == 0:
+        return emb
+    
+    norms = np.sqrt(np.einsum("ij,ij->i", emb, emb))
+    emb /= np.maximum(norms, _EPSILON)[:, None]
+    return emb
@@ -0,0 +1,96 @@
+"""
+ONNX Embeddings Module
+Runs the sentence-transformers embedding model through ONNX Runtime
+Drop-in replacement for HuggingFaceEmbeddings with fused CPU kernels
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import onnxruntime as ort
+from langchain_core.embeddings import Embeddings
+from transformers import AutoTokenizer
+
+from backend.math_utils import normalize_2d
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Matches the max_seq_length of all-MiniLM-L6-v2 in sentence-transformers
+MAX_SEQ_LENGTH = 256
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Mean-pooled, L2-normalized sentence embeddings from an exported ONNX model
+    Export the model first with: python scripts/export_embed_onnx.py
+    """
+    
+    def __init__(self, model_dir: str, model_file: str = "model.onnx", batch_size: int = 128):
+        """
+        Load the tokenizer and ONNX Runtime session
+        
+        Args:
+            model_dir: Directory containing the exported model and tokenizer files
+            model_file: ONNX file name inside model_dir
+            batch_size: Number of texts per forward pass
+        """
+        model_path = Path(model_dir) / model_file
+        logger.info(f"Loading ONNX embedding model from {model_path}")
+        
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir, use_fast=True)
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = os.cpu_count() or 1
+        self.session = ort.InferenceSession(
+            str(model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+    
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts in batches
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            List of embedding vectors
+        """
+        vectors = []
+        
+        for start in range(0, len(texts), self.batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                return_tensors="np",
+            )
+            inputs = {name: value for name, value in encoded.items() if name in self._input_names}
+            last_hidden = self.session.run(None, inputs)[0]
+            
+            # Mean pooling over real (non-padding) tokens, then L2 normalization
+            mask = encoded["attention_mask"].astype(np.float32)
+            summed = np.einsum("bsd,bs->bd", last_hidden, mask)
+            pooled = normalize_2d(summed / np.clip(mask.sum(axis=1, keepdims=True), 1e-9, None))
+            
+            vectors.extend(pooled.tolist())
+        
+        return vectors
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of document chunks"""
+        return self._encode(list(texts))
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string"""
+        return self._encode([text])[0]
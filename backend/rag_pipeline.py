@@ -4,9 +4,13 @@ Implements the core Retrieval Augmented Generation logic
 Combines document retrieval with LLaMA 3 generation via Ollama
 """
 
+import asyncio
 import logging
-from typing import Dict, List
+import time
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
 from backend.config import (
@@ -23,6 +27,13 @@ from backend.schemas import ChatResponse, SourceDocument
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+NO_CONTEXT_ANSWER = "I couldn't find any relevant information in the college documents to answer your question. Please try rephrasing or ask about topics covered in our documentation."
+
+
+def _sse_event(event: str, data: Dict) -> str:
+    """Format a server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 
 class RAGPipeline:
     """
@@ -37,6 +48,23 @@ class RAGPipeline:
         self.temperature = OLLAMA_TEMPERATURE
         self.max_tokens = OLLAMA_MAX_TOKENS
         self.system_prompt = self._load_system_prompt()
+        
+        # Static prompt parts, built once instead of on every request
+        self._prompt_prefix = self.system_prompt + "\n\nCONTEXT DOCUMENTS:\n"
+        self._prompt_mid = "\n\nUSER QUESTION: "
+        self._prompt_suffix = "\n\nANSWER:"
+        
+        # Reuse pooled keep-alive connections to Ollama across requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Short-lived cache of the last successful health probe
+        self._health_ok_until = 0.0
+        
+        # Async client for non-blocking generation (opened in the app lifespan)
+        self.async_client: Optional[httpx.AsyncClient] = None
     
     def _load_system_prompt(self) -> str:
         """Load the system prompt from file"""
@@ -76,16 +104,25 @@ CRITICAL RULES:
         Returns:
             Formatted prompt string
         """
-        prompt = f"""{self.system_prompt}
-
-CONTEXT DOCUMENTS:
-{context}
-
-USER QUESTION: {question}
-
-ANSWER:"""
-        
-        return prompt
+        return "".join((
+            self._prompt_prefix,
+            context,
+            self._prompt_mid,
+            question,
+            self._prompt_suffix,
+        ))
+    
+    def _build_payload(self, prompt: str, stream: bool) -> Dict:
+        """Build the Ollama /api/generate request body"""
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": self.temperature,
+                "num_predict": self.max_tokens,
+            }
+        }
     
     def _call_ollama(self, prompt: str) -> str:
         """
@@ -98,19 +135,11 @@ ANSWER:"""
             Generated response from LLaMA 3
         """
         try:
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": self.temperature,
-                    "num_predict": self.max_tokens,
-                }
-            }
+            payload = self._build_payload(prompt, stream=False)
             
             logger.info(f"Calling Ollama API with model: {self.model_name}")
             
-            response = requests.post(
+            response = self.session.post(
                 self.ollama_url,
                 json=payload,
                 timeout=120  # 2 minute timeout for generation
@@ -135,18 +164,119 @@ ANSWER:"""
             logger.error(f"Error calling Ollama: {str(e)}")
             return f"Error generating response: {str(e)}"
     
+    async def _call_ollama_async(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Stream a response from Ollama without blocking the event loop
+        
+        Args:
+            prompt: Complete prompt with context and question
+            
+        Yields:
+            Generated text fragments as they arrive
+        """
+        try:
+            payload = self._build_payload(prompt, stream=True)
+            
+            logger.info(f"Streaming from Ollama API with model: {self.model_name}")
+            
+            async with self.async_client.stream("POST", self.ollama_url, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    token = chunk.get("response", "")
+                    if token:
+                        yield token
+                    if chunk.get("done"):
+                        break
+            
+            logger.info("Successfully streamed response from Ollama")
+            
+        except httpx.TimeoutException:
+            logger.error("Ollama request timed out")
+            yield "Error: Request timed out. Please try again."
+        except httpx.ConnectError:
+            logger.error("Could not connect to Ollama. Make sure it's running.")
+            yield "Error: Could not connect to Ollama. Please ensure Ollama is running with 'ollama serve'."
+        except Exception as e:
+            logger.error(f"Error calling Ollama: {str(e)}")
+            yield f"Error generating response: {str(e)}"
+    
+    async def warmup(self) -> None:
+        """
+        Preload the model into Ollama's memory with a one-token generation
+        so the first chat request does not pay the model load time
+        """
+        try:
+            payload = {
+                "model": self.model_name,
+                "prompt": "",
+                "stream": False,
+                "options": {"num_predict": 1},
+            }
+            response = await self.async_client.post(self.ollama_url, json=payload)
+            response.raise_for_status()
+            self._health_ok_until = time.monotonic() + 2
+            logger.info(f"Ollama model {self.model_name} preloaded")
+        except Exception as e:
+            logger.warning(f"Could not preload Ollama model: {str(e)}")
+    
     def check_ollama_health(self) -> bool:
         """
         Check if Ollama service is available
+        A successful probe is cached for 2 seconds
         
         Returns:
             True if Ollama is running, False otherwise
         """
+        if time.monotonic() < self._health_ok_until:
+            return True
+        
         try:
-            response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-            return response.status_code == 200
+            response = self.session.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
+            healthy = response.status_code == 200
         except:
             return False
+        
+        if healthy:
+            self._health_ok_until = time.monotonic() + 2
+        return healthy
+    
+    async def acheck_ollama_health(self) -> bool:
+        """
+        Async variant of check_ollama_health for use inside request handlers
+        Probes through the shared async client so the event loop is never blocked
+        
+        Returns:
+            True if Ollama is running, False otherwise
+        """
+        if time.monotonic() < self._health_ok_until:
+            return True
+        
+        if self.async_client is None:
+            return await asyncio.to_thread(self.check_ollama_health)
+        
+        try:
+            response = await self.async_client.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
+            healthy = response.status_code == 200
+        except:
+            return False
+        
+        if healthy:
+            self._health_ok_until = time.monotonic() + 2
+        return healthy
+    
+    def _format_sources(self, sources: List[Dict]) -> List[SourceDocument]:
+        """Convert retrieved source dicts into truncated SourceDocument models"""
+        return [
+            SourceDocument(
+                content=src["content"][:300] + "..." if len(src["content"]) > 300 else src["content"],
+                source=src["source"],
+                relevance_score=src["relevance_score"]
+            )
+            for src in sources
+        ]
     
     def generate_response(self, question: str) -> ChatResponse:
         """
@@ -165,7 +295,7 @@ ANSWER:"""
         
         if not context:
             return ChatResponse(
-                answer="I couldn't find any relevant information in the college documents to answer your question. Please try rephrasing or ask about topics covered in our documentation.",
+                answer=NO_CONTEXT_ANSWER,
                 sources=[],
                 conversation_id=None
             )
@@ -177,14 +307,7 @@ ANSWER:"""
         answer = self._call_ollama(prompt)
         
         # Step 4: Format sources
-        source_documents = [
-            SourceDocument(
-                content=src["content"][:300] + "..." if len(src["content"]) > 300 else src["content"],
-                source=src["source"],
-                relevance_score=src["relevance_score"]
-            )
-            for src in sources
-        ]
+        source_documents = self._format_sources(sources)
         
         # Step 5: Return response
         return ChatResponse(
@@ -192,6 +315,64 @@ ANSWER:"""
             sources=source_documents,
             conversation_id=None
         )
+    
+    async def agenerate_response(self, question: str) -> ChatResponse:
+        """
+        Generate response using RAG pipeline without blocking the event loop
+        
+        Args:
+            question: User's question
+            
+        Returns:
+            ChatResponse with answer and sources
+        """
+        logger.info(f"Processing question: '{question[:100]}...'")
+        
+        # Retrieval is CPU-bound (query embedding), so run it off the loop
+        context, sources = await asyncio.to_thread(vector_store.get_relevant_context, question)
+        
+        if not context:
+            return ChatResponse(
+                answer=NO_CONTEXT_ANSWER,
+                sources=[],
+                conversation_id=None
+            )
+        
+        prompt = self._build_prompt(question, context)
+        answer = "".join([token async for token in self._call_ollama_async(prompt)])
+        
+        return ChatResponse(
+            answer=answer.strip(),
+            sources=self._format_sources(sources),
+            conversation_id=None
+        )
+    
+    async def stream_response(self, question: str) -> AsyncIterator[str]:
+        """
+        Stream the generated answer as server-sent events
+        
+        Args:
+            question: User's question
+            
+        Yields:
+            SSE-formatted "sources" event, then "token" events, then "done"
+        """
+        logger.info(f"Streaming answer for question: '{question[:100]}...'")
+        
+        context, sources = await asyncio.to_thread(vector_store.get_relevant_context, question)
+        
+        # Sources are known before generation starts, so send them first
+        source_documents = self._format_sources(sources)
+        yield _sse_event("sources", {"sources": [src.model_dump() for src in source_documents]})
+        
+        if not context:
+            yield _sse_event("token", {"token": NO_CONTEXT_ANSWER})
+        else:
+            prompt = self._build_prompt(question, context)
+            async for token in self._call_ollama_async(prompt):
+                yield _sse_event("token", {"token": token})
+        
+        yield _sse_event("done", {})
 
 
 # Singleton instance
@@ -0,0 +1,76 @@
+"""
+INT8 Quantization Script
+Dynamically quantizes the exported ONNX embedding model to int8 weights
+Run after scripts/export_embed_onnx.py, then set ONNX_MODEL_FILE=model_int8.onnx
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import logging
+import numpy as np
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+from backend.config import ONNX_MODEL_DIR
+from backend.document_loader import document_loader
+from backend.onnx_embeddings import OnnxEmbeddings
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model_int8.onnx"
+
+# Quantized vectors must keep at least this cosine similarity to fp32 ones
+MIN_COSINE_SIMILARITY = 0.995
+VALIDATION_SAMPLES = 256
+
+
+def main():
+    """
+    Quantize the model, then validate it against the fp32 baseline
+    The quantized file is removed if validation fails
+    """
+    fp32_path = ONNX_MODEL_DIR / FP32_MODEL_FILE
+    int8_path = ONNX_MODEL_DIR / INT8_MODEL_FILE
+    
+    if not fp32_path.exists():
+        logger.error(f"ONNX model not found at {fp32_path}. Run scripts/export_embed_onnx.py first.")
+        sys.exit(1)
+    
+    logger.info(f"Quantizing {fp32_path} -> {int8_path}...")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    
+    # Validate on real chunks from the data/ directory
+    texts = [doc.page_content for doc in document_loader.load_and_chunk()[:VALIDATION_SAMPLES]]
+    if not texts:
+        logger.error("No documents found in data/ to validate against.")
+        sys.exit(1)
+    
+    fp32_vectors = np.asarray(OnnxEmbeddings(str(ONNX_MODEL_DIR), FP32_MODEL_FILE).embed_documents(texts))
+    int8_vectors = np.asarray(OnnxEmbeddings(str(ONNX_MODEL_DIR), INT8_MODEL_FILE).embed_documents(texts))
+    
+    # Both sets are L2-normalized, so the row-wise dot product is the cosine
+    similarities = (fp32_vectors * int8_vectors).sum(axis=1)
+    logger.info(
+        f"Cosine similarity vs fp32 over {len(texts)} chunks: "
+        f"mean={similarities.mean():.4f}, min={similarities.min():.4f}"
+    )
+    
+    if similarities.mean() < MIN_COSINE_SIMILARITY:
+        logger.error(f"✗ Quantized model lost too much accuracy; removing {int8_path}")
+        int8_path.unlink()
+        sys.exit(1)
+    
+    logger.info(f"✓ Quantized model validated. Set ONNX_MODEL_FILE={INT8_MODEL_FILE} to use it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+ONNX Export Script
+Exports the sentence-transformers embedding model to ONNX for ONNX Runtime
+Run once, then set EMBEDDING_BACKEND=onnx to use the exported model
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import logging
+from optimum.exporters.onnx import main_export
+
+from backend.config import EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """
+    Export the embedding model and its tokenizer to ONNX_MODEL_DIR
+    """
+    logger.info(f"Exporting {EMBEDDING_MODEL_NAME} to ONNX at {ONNX_MODEL_DIR}...")
+    
+    main_export(
+        EMBEDDING_MODEL_NAME,
+        output=ONNX_MODEL_DIR,
+        task="feature-extraction",
+    )
+    
+    logger.info("✓ Export complete. Set EMBEDDING_BACKEND=onnx to use it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,83 +4,346 @@ Loads all documents from data/ directory and indexes them into ChromaDB
 Run this script after adding or updating documents in the data/ folder
 """
 
+import atexit
+import os
+import shutil
 import sys
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 # Add parent directory to path to import backend modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Optionally build the Chroma index on a RAM-backed tmpfs and copy it to disk
+# afterwards. This must run before backend.config is imported, because the
+# vector store singleton reads CHROMA_PERSIST_DIR at import time. Load the same
+# backend/.env as backend.config first, so these settings match what it will see
+load_dotenv(Path(__file__).resolve().parent.parent / "backend" / ".env")
+RAMDISK_BUILD_DIR = Path("/dev/shm/chroma_build")
+RAMDISK_INDEX = (
+    os.getenv("RAMDISK_INDEX", "false").lower() == "true"
+    and RAMDISK_BUILD_DIR.parent.is_dir()
+)
+FINAL_PERSIST_DIR = Path(os.getenv("CHROMA_PERSIST_DIR", str(Path(__file__).parent.parent / "vector_db")))
+
+if RAMDISK_INDEX:
+    # Seed with the current index so incremental runs still see existing chunks
+    shutil.rmtree(RAMDISK_BUILD_DIR, ignore_errors=True)
+    if FINAL_PERSIST_DIR.is_dir():
+        shutil.copytree(
+            FINAL_PERSIST_DIR,
+            RAMDISK_BUILD_DIR,
+            ignore=shutil.ignore_patterns("embedding_cache.sqlite3*"),
+        )
+    os.environ["CHROMA_PERSIST_DIR"] = str(RAMDISK_BUILD_DIR)
+    atexit.register(shutil.rmtree, RAMDISK_BUILD_DIR, ignore_errors=True)
+
+import argparse
+import asyncio
 import logging
-from backend.document_loader import document_loader
-from backend.vector_store import vector_store
+import time
+from typing import Dict, List, Optional
+
+from tqdm import tqdm
+
+from backend.config import (
+    ANN_PROFILE,
+    DATA_DIR,
+    PIPELINE_CONCURRENCY,
+    VECTOR_BATCH_SIZE,
+)
+from backend.document_loader import get_loader
+from backend.incremental_index import (
+    load_manifest,
+    plan_run,
+    snapshot_data_dir,
+    source_key,
+    write_manifest,
+)
+from backend.vector_store import get_vector_store
 
-# Configure logging
+# Configure logging; force replaces the handler the backend modules installed on import
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s %(levelname)s %(message)s',
+    force=True
 )
 logger = logging.getLogger(__name__)
 
+BANNER = "=" * 80
 
-def main():
+START_BANNER = f"""{BANNER}
+STARTING DOCUMENT INDEXING PROCESS
+{BANNER}"""
+
+SUCCESS_BANNER = f"""
+{BANNER}
+INDEXING COMPLETED SUCCESSFULLY!
+{BANNER}
+
+Your vector database is ready. You can now:
+  1. Start the FastAPI server: python -m backend.main
+  2. Or use: uvicorn backend.main:app --reload
+  3. Access API docs at: http://localhost:8000/docs
+{BANNER}"""
+
+# A partial batch is flushed if no new chunk arrives within this many seconds
+BATCH_FLUSH_SECONDS = 0.5
+
+
+async def produce_chunks(queue: asyncio.Queue, consumers: int, paths: Optional[List[Path]]) -> None:
+    """
+    Load and chunk documents into the queue, then signal each consumer to stop
+    
+    Args:
+        queue: Bounded queue shared with the consumers
+        consumers: Number of consumer tasks to signal
+        paths: Files to load, or None for the whole data directory
+    """
+    try:
+        async for chunk in get_loader().aiter_load_and_chunk(paths):
+            await queue.put(chunk)
+    finally:
+        for _ in range(consumers):
+            await queue.put(None)
+
+
+async def consume_chunks(queue: asyncio.Queue, progress: tqdm) -> None:
+    """
+    Drain the queue in batches and index each batch
+    
+    Args:
+        queue: Bounded queue shared with the producer
+        progress: Progress bar advanced per indexed batch
+    """
+    done = False
+    while not done:
+        batch = []
+        while len(batch) < VECTOR_BATCH_SIZE:
+            try:
+                # Block for the first chunk; flush a partial batch if loading stalls
+                if batch:
+                    chunk = await asyncio.wait_for(queue.get(), timeout=BATCH_FLUSH_SECONDS)
+                else:
+                    chunk = await queue.get()
+            except asyncio.TimeoutError:
+                break
+            if chunk is None:
+                done = True
+                break
+            batch.append(chunk)
+        
+        if batch:
+            progress.update(await get_vector_store().aindex_batch(batch))
+
+
+async def run_index(paths: Optional[List[Path]] = None) -> Dict:
+    """
+    Run loading and indexing as an asyncio producer/consumer pipeline
+    
+    Args:
+        paths: Files to index incrementally, or None for a full pass over data/
+        
+    Returns:
+        Dictionary with indexing statistics
+    """
+    get_vector_store().begin_index()
+    queue = asyncio.Queue(maxsize=2 * VECTOR_BATCH_SIZE)
+    
+    with tqdm(unit="chunk", desc="Embedding + insert") as progress:
+        await asyncio.gather(
+            produce_chunks(queue, PIPELINE_CONCURRENCY, paths),
+            *(consume_chunks(queue, progress) for _ in range(PIPELINE_CONCURRENCY)),
+        )
+    
+    if paths is None:
+        return get_vector_store().finish_index()
+    
+    # Failed files keep their previous chunks; every other re-indexed source is
+    # pruned, even if it no longer produces any chunks
+    failed = {source_key(path) for path, _ in get_loader().failed}
+    sources = [key for key in map(source_key, paths) if key not in failed]
+    return get_vector_store().finish_index(sources=sources)
+
+
+def log_failed_files() -> None:
+    """Summarize files that were rejected or failed to parse"""
+    failed = get_loader().failed
+    if not failed:
+        return
+    
+    lines = [f"\n{len(failed)} file(s) skipped:"]
+    lines.extend(f"  - {path}: {reason}" for path, reason in failed)
+    logger.warning("\n".join(lines))
+
+
+def sync_ramdisk_index() -> None:
+    """Copy the tmpfs-built Chroma index over the on-disk one"""
+    FINAL_PERSIST_DIR.mkdir(parents=True, exist_ok=True)
+    
+    # Drop segment directories of collections that no longer exist
+    for entry in FINAL_PERSIST_DIR.iterdir():
+        if entry.is_dir() and not (RAMDISK_BUILD_DIR / entry.name).exists():
+            shutil.rmtree(entry)
+    
+    shutil.copytree(RAMDISK_BUILD_DIR, FINAL_PERSIST_DIR, dirs_exist_ok=True)
+    logger.info("  - Copied RAM-disk index from %s to %s", RAMDISK_BUILD_DIR, FINAL_PERSIST_DIR)
+
+
+def index_once(full: bool = False):
     """
-    Main indexing function
-    Loads documents, chunks them, and indexes into vector store
+    Run one indexing pass over new, modified and removed files
+    Overlaps document loading with embedding, so embedding starts as soon
+    as the first file is parsed and disk latency hides behind compute
+    
+    Args:
+        full: Ignore the manifest and re-index the whole data directory
     """
-    logger.info("=" * 80)
-    logger.info("STARTING DOCUMENT INDEXING PROCESS")
-    logger.info("=" * 80)
+    logger.info(START_BANNER)
     
     try:
-        # Step 1: Load and chunk documents
-        logger.info("\n[Step 1/3] Loading and chunking documents from data/ directory...")
-        chunked_documents = document_loader.load_and_chunk()
+        # The manifest only describes the current collection; a model or ANN
+        # profile change (which recreates the collection) forces a full pass
+        manifest = load_manifest()
+        model_key = get_vector_store().collection_metadata["embedding_model"]
+        full = (
+            full
+            or manifest.get("embedding_model") != model_key
+            or get_vector_store().needs_rebuild()
+        )
         
-        if not chunked_documents:
-            logger.error("No documents found or loaded. Please add documents to the data/ directory.")
-            logger.error("Supported formats: .txt, .pdf, .md, .docx")
-            return
+        delta, removed, entries = plan_run({} if full else manifest.get("files", {}))
+        logger.info(
+            "\n[Step 1/3] Scanning data/ directory (%s run)..."
+            "\n  - New or modified: %s, removed or emptied: %s, unchanged: %s",
+            "full" if full else "incremental",
+            len(delta),
+            len(removed),
+            len(entries.keys() - removed) - len(delta),
+        )
         
-        # Get statistics
-        stats = document_loader.get_document_stats(chunked_documents)
-        logger.info(f"\nDocument Statistics:")
-        logger.info(f"  - Total chunks created: {stats['total_documents']}")
-        logger.info(f"  - Unique source files: {stats['total_sources']}")
-        logger.info(f"\nSource files:")
-        for source in stats['sources']:
-            logger.info(f"  - {source}")
+        get_vector_store().delete_sources(removed)
+        if not delta:
+            if RAMDISK_INDEX and removed:
+                sync_ramdisk_index()
+            write_manifest({"embedding_model": model_key, "files": entries})
+            logger.info("\n✓ No new or modified files; the index is up to date")
+            return
         
-        # Step 2: Index documents into vector store
-        logger.info(f"\n[Step 2/3] Indexing {len(chunked_documents)} chunks into ChromaDB...")
-        result = vector_store.index_documents(chunked_documents)
+        # Step 2: Load, chunk and index as one producer/consumer pipeline
+        logger.info(
+            "\n[Step 2/3] Indexing chunks into ChromaDB as they are produced "
+            "(%s concurrent batches, ANN profile: %s)...",
+            PIPELINE_CONCURRENCY,
+            ANN_PROFILE,
+        )
+        bytes_before = get_vector_store().get_storage_bytes()
+        try:
+            result = asyncio.run(run_index(None if full else delta))
+        finally:
+            # Single HNSW flush at the end, even if indexing stopped part-way
+            get_vector_store().persist()
+        if RAMDISK_INDEX and result["status"] == "success":
+            sync_ramdisk_index()
+        logger.info(
+            "  - Vector DB on disk: %.1f MB -> %.1f MB",
+            bytes_before / 1e6,
+            get_vector_store().get_storage_bytes() / 1e6,
+        )
         
-        if result["status"] == "success":
-            logger.info(f"\n✓ {result['message']}")
-        else:
-            logger.error(f"\n✗ {result['message']}")
+        if result["status"] != "success":
+            logger.error(
+                "\n✗ %s\nPlease add documents to the data/ directory.\n"
+                "Supported formats: .txt, .pdf, .md, .docx",
+                result["message"],
+            )
+            log_failed_files()
             return
         
+        # Failed files stay out of the manifest so the next run retries them
+        failed_keys = {source_key(path) for path, _ in get_loader().failed}
+        write_manifest({
+            "embedding_model": model_key,
+            "files": {key: entry for key, entry in entries.items() if key not in failed_keys},
+        })
+        
+        # Statistics accumulated by the loader while streaming
+        if logger.isEnabledFor(logging.INFO):
+            stats = get_loader().stats
+            lines = [
+                f"\n✓ {result['message']}",
+                f"  - Already indexed (skipped): {result['cached_hits']}/{result['total_chunks']} chunks",
+                f"  - Embedding cache dtype: {result['embed_dtype']} "
+                f"(saved {result['cache_bytes_saved'] / 1e9:.3f} GB vs fp32)",
+                "\nDocument Statistics:",
+                f"  - Files loaded: {stats.files_loaded} ({stats.documents_loaded} documents)",
+                f"  - Total chunks created: {stats.total_chunks}",
+                f"  - Unique source files: {len(stats.chunks_per_source)}",
+                "\nSource files:",
+            ]
+            lines.extend(
+                f"  - {source} ({stats.chunks_per_source[source]} chunks)"
+                for source in stats.sources
+            )
+            logger.info("\n".join(lines))
+        
         # Step 3: Verify indexing
-        logger.info("\n[Step 3/3] Verifying indexing...")
-        collection_count = vector_store.get_collection_count()
-        logger.info(f"  - Documents in vector store: {collection_count}")
+        collection_count = get_vector_store().get_collection_count()
+        logger.info("\n[Step 3/3] Verifying indexing...\n  - Documents in vector store: %s", collection_count)
+        log_failed_files()
         
         if collection_count > 0:
-            logger.info("\n" + "=" * 80)
-            logger.info("INDEXING COMPLETED SUCCESSFULLY!")
-            logger.info("=" * 80)
-            logger.info("\nYour vector database is ready. You can now:")
-            logger.info("  1. Start the FastAPI server: python -m backend.main")
-            logger.info("  2. Or use: uvicorn backend.main:app --reload")
-            logger.info("  3. Access API docs at: http://localhost:8000/docs")
-            logger.info("=" * 80)
+            logger.info(SUCCESS_BANNER)
         else:
             logger.error("Indexing verification failed. No documents in vector store.")
     
     except Exception as e:
-        logger.error(f"\n✗ Error during indexing: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("\n✗ Error during indexing: %s", e)
+
+
+def watch(interval: float, snapshot: Dict[Path, int]) -> None:
+    """
+    Poll data/ and re-index whenever files are added, modified or removed
+    The cached loader and vector store (and their models) are reused across passes
+    
+    Args:
+        interval: Seconds between polls
+        snapshot: File modification times as of the last indexing pass
+    """
+    logger.info("Watching %s for changes every %ss (Ctrl+C to stop)", DATA_DIR, interval)
+    
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot_data_dir()
+            if current == snapshot:
+                continue
+            
+            modified = sum(1 for path, mtime in current.items() if snapshot.get(path) != mtime)
+            removed = len(snapshot.keys() - current.keys())
+            logger.info("Detected %s new/modified and %s removed file(s); re-indexing", modified, removed)
+            
+            snapshot = current
+            index_once()
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+
+
+def main():
+    """Main indexing function"""
+    parser = argparse.ArgumentParser(description="Index documents from data/ into ChromaDB")
+    parser.add_argument("--watch", action="store_true", help="keep running and re-index when data/ changes")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls in --watch mode")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and re-index every file")
+    args = parser.parse_args()
+    
+    # Snapshot before indexing so edits made during the pass are picked up
+    snapshot = snapshot_data_dir() if args.watch else {}
+    index_once(full=args.full)
+    
+    if args.watch:
+        watch(args.interval, snapshot)
 
 
 if __name__ == "__main__":
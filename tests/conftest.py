@@ -0,0 +1,10 @@
+"""
+Pytest configuration
+Makes the backend package importable when running pytest from the repo root
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import backend modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,131 @@
+"""
+Tests for incremental indexing: manifest planning and stale-chunk pruning
+"""
+
+import os
+import uuid
+
+import chromadb
+import pytest
+
+from backend.incremental_index import (
+    chunk_id,
+    find_stale_ids,
+    load_manifest,
+    plan_run,
+    write_manifest,
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / "data"
+    path.mkdir()
+    (path / "a.txt").write_text("alpha", encoding="utf-8")
+    (path / "b.md").write_text("beta", encoding="utf-8")
+    (path / "notes.json").write_text("{}", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def collection():
+    client = chromadb.EphemeralClient()
+    return client.create_collection(f"test_{uuid.uuid4().hex}", embedding_function=None)
+
+
+def add_chunks(collection, source, texts):
+    collection.add(
+        ids=[chunk_id(source, text) for text in texts],
+        embeddings=[[1.0, 0.0] for _ in texts],
+        metadatas=[{"source": source} for _ in texts],
+        documents=texts,
+    )
+
+
+def test_first_run_indexes_every_supported_file(data_dir):
+    delta, purged, entries = plan_run({}, data_dir)
+
+    assert [path.name for path in delta] == ["a.txt", "b.md"]
+    assert purged == []
+    assert sorted(entries) == ["data/a.txt", "data/b.md"]
+
+
+def test_unchanged_and_touched_files_are_skipped(data_dir):
+    _, _, entries = plan_run({}, data_dir)
+
+    stat = (data_dir / "a.txt").stat()
+    os.utime(data_dir / "a.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    delta, purged, new_entries = plan_run(entries, data_dir)
+
+    assert delta == []
+    assert purged == []
+    assert new_entries["data/a.txt"][0] == stat.st_mtime_ns + 10**9
+
+
+def test_modified_removed_and_emptied_files(data_dir):
+    _, _, entries = plan_run({}, data_dir)
+
+    (data_dir / "a.txt").write_text("alpha, revised", encoding="utf-8")
+    (data_dir / "b.md").write_text("", encoding="utf-8")
+    (data_dir / "c.txt").write_text("gamma", encoding="utf-8")
+    delta, purged, new_entries = plan_run(entries, data_dir)
+
+    assert [path.name for path in delta] == ["a.txt", "c.txt"]
+    assert purged == ["data/b.md"]
+    # The emptied file stays in the manifest so it is not purged again
+    assert "data/b.md" in new_entries
+
+    (data_dir / "c.txt").unlink()
+    delta, purged, _ = plan_run(new_entries, data_dir)
+
+    assert delta == []
+    assert purged == ["data/c.txt"]
+
+
+def test_manifest_round_trip(tmp_path, data_dir):
+    manifest_path = tmp_path / ".index_manifest.json"
+    _, _, entries = plan_run({}, data_dir)
+
+    write_manifest({"files": entries}, manifest_path)
+
+    assert load_manifest(manifest_path) == {"files": entries}
+    assert not manifest_path.with_name(manifest_path.name + ".tmp").exists()
+    assert load_manifest(tmp_path / "missing.json") == {}
+
+
+def test_chunk_ids_depend_on_source():
+    assert chunk_id("data/a.txt", "shared") != chunk_id("data/b.txt", "shared")
+    assert chunk_id("data/a.txt", "shared") == chunk_id("data/a.txt", "shared")
+
+
+def test_incremental_prune_keeps_shared_text_of_other_sources(collection):
+    add_chunks(collection, "data/a.txt", ["shared", "only in a"])
+    add_chunks(collection, "data/b.txt", ["shared"])
+
+    # a.txt was edited and now only contains new text
+    seen_ids = {chunk_id("data/a.txt", "rewritten")}
+    stale = find_stale_ids(collection, seen_ids, sources=["data/a.txt"])
+
+    assert sorted(stale) == sorted([chunk_id("data/a.txt", "shared"), chunk_id("data/a.txt", "only in a")])
+
+    collection.delete(ids=stale)
+    remaining = collection.get(where={"source": "data/b.txt"})
+    assert remaining["documents"] == ["shared"]
+
+
+def test_incremental_prune_of_source_without_chunks(collection):
+    add_chunks(collection, "data/a.txt", ["alpha"])
+    add_chunks(collection, "data/b.txt", ["beta"])
+
+    stale = find_stale_ids(collection, set(), sources=["data/a.txt"])
+
+    assert stale == [chunk_id("data/a.txt", "alpha")]
+
+
+def test_full_prune_checks_the_whole_collection(collection):
+    add_chunks(collection, "data/a.txt", ["alpha"])
+    add_chunks(collection, "data/b.txt", ["beta"])
+
+    stale = find_stale_ids(collection, {chunk_id("data/a.txt", "alpha")})
+
+    assert stale == [chunk_id("data/b.txt", "beta")]